@@ -1,17 +1,15 @@
 # backend/app/config.py
 from __future__ import annotations
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 import os
-from typing import Final
-from dotenv import load_dotenv
+from collections.abc import Mapping
+from functools import lru_cache
+from dotenv import dotenv_values
 
-# Load .env for local dev (no-op if not present)
-load_dotenv()
 
-
-def _require_env(name: str) -> str:
-    value = os.getenv(name)
+def _require_env(env: Mapping[str, str | None], name: str) -> str:
+    value = env.get(name)
     if not value:
         raise RuntimeError(
             f"Missing required environment variable: {name}. "
@@ -21,12 +19,33 @@ def _require_env(name: str) -> str:
 
 
 class Settings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     # Database URL defaults to SQLite if not set
-    database_url: Final[str] = os.getenv("DATABASE_URL", "sqlite:///./local.db")
+    database_url: str = "sqlite:///./local.db"
 
     # Required secrets
-    pf_client_id: Final[str] = _require_env("PF_CLIENT_ID")
-    pf_client_secret: Final[str] = _require_env("PF_CLIENT_SECRET")
-
-
-settings = Settings()
+    pf_client_id: str
+    pf_client_secret: str
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Read settings from the environment on first use and cache them.
+
+    Deferring this keeps ``import backend.app...`` free of environment checks,
+    so code paths that never touch Petfinder or the DB work without credentials.
+
+    Raises:
+        RuntimeError: If a required environment variable is missing.
+    """
+    # .env fills gaps for local dev (no-op if not present); real env vars win.
+    # Read, not loaded, so os.environ is never mutated behind the caller's back.
+    env: dict[str, str | None] = {**dotenv_values(), **os.environ}
+    # only override the model's default when DATABASE_URL is actually set
+    db_url = {"database_url": url} if (url := env.get("DATABASE_URL")) else {}
+    return Settings(
+        pf_client_id=_require_env(env, "PF_CLIENT_ID"),
+        pf_client_secret=_require_env(env, "PF_CLIENT_SECRET"),
+        **db_url,
+    )
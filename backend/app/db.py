@@ -1,6 +1,42 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from .config import settings
+from functools import cache
 
-engine = create_engine(settings.database_url, future=True, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.engine import Engine
+from .config import get_settings
+
+# Recycle pooled connections before typical server/LB idle timeouts drop them
+POOL_RECYCLE_S = 1800
+
+
+def get_engine(
+    *, pre_ping: bool = True, pool_size: int = 10, max_overflow: int | None = None
+) -> Engine:
+    """Create an engine on first use, one per distinct configuration.
+
+    Nothing is connected or dialect-loaded at import time, so importing
+    modules that depend on this one stays cheap (and works without settings).
+
+    Args:
+        pre_ping: Test connections with a round-trip on every checkout. Batch
+            jobs holding one connection can turn this off and rely on
+            ``pool_recycle`` for freshness.
+        pool_size: Persistent connections kept by the pool.
+        max_overflow: Extra connections allowed beyond ``pool_size``; defaults to
+            ``2 * pool_size``. Pass 0 to cap the pool at exactly ``pool_size``.
+    """
+    overflow = 2 * pool_size if max_overflow is None else max_overflow
+    # normalize before caching so default and explicit arguments share one engine
+    return _engine(pre_ping, pool_size, overflow)
+
+
+@cache
+def _engine(pre_ping: bool, pool_size: int, max_overflow: int) -> Engine:
+    url = make_url(get_settings().database_url)
+    pool_kw: dict[str, int] = {}
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        # in-memory SQLite uses a per-thread singleton pool; sizing only applies
+        # to QueuePool (servers and SQLite files)
+        pool_kw = {"pool_size": pool_size, "max_overflow": max_overflow}
+    return create_engine(
+        url, future=True, pool_pre_ping=pre_ping, pool_recycle=POOL_RECYCLE_S, **pool_kw
+    )
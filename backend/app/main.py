@@ -1,13 +1,9 @@
 from fastapi import FastAPI
-from pydantic import BaseModel
 
 app = FastAPI(title="Petfinder Dashboard API")
 
 
-class HealthResponse(BaseModel):
-    ok: bool
-
-
-@app.get("/health", response_model=HealthResponse)
-def health() -> HealthResponse:
-    return HealthResponse(ok=True)
+# Polled by load balancers; response_model=None skips per-call pydantic validation
+@app.get("/health", response_model=None)
+def health() -> dict[str, bool]:
+    return {"ok": True}
@@ -1,6 +1,7 @@
 from __future__ import annotations
+import datetime as dt
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Boolean, Integer, Float, DateTime, ForeignKey, func, Index
+from sqlalchemy import String, Boolean, Integer, Float, DateTime, ForeignKey, func, Index, text
 
 
 class Base(DeclarativeBase):
@@ -57,8 +58,8 @@ class Animal(Base):
     photo_count: Mapped[int] = mapped_column(Integer, default=0)
     bio_len: Mapped[int] = mapped_column(Integer, default=0)
 
-    first_adoptable_ts: Mapped[DateTime | None]
-    first_adopted_ts: Mapped[DateTime | None]
+    first_adoptable_ts: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True))
+    first_adopted_ts: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True))
 
     org: Mapped[Organization] = relationship(back_populates="animals")
     statuses: Mapped[list[AnimalStatusHistory]] = relationship(
@@ -74,17 +75,34 @@ class AnimalStatusHistory(Base):
 
     # surrogate primary key for history rows
     id: Mapped[int] = mapped_column(primary_key=True)
-    animal_id: Mapped[int] = mapped_column(ForeignKey("animals.animal_id"), index=True)
+    # indexed as the prefix of ix_status_by_animal_time
+    animal_id: Mapped[int] = mapped_column(ForeignKey("animals.animal_id"), index=False)
 
     status: Mapped[str] = mapped_column(String, index=True)  # adoptable/adopted/found
-    status_ts: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
+    status_ts: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True))
 
-    seen_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    seen_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     row_hash: Mapped[str] = mapped_column(String, index=True)  # idempotency
 
     animal: Mapped[Animal] = relationship(back_populates="statuses")
 
 
-# TODO: maybe future index (add in later migration if needed):
-# Index("ix_status_by_org_time", AnimalStatusHistory.animal_id, AnimalStatusHistory.status_ts)
+# Latest status per animal: WHERE animal_id = ? ORDER BY status_ts DESC LIMIT 1.
+# On Postgres, INCLUDE makes it covering for status/idempotency lookups.
+Index(
+    "ix_status_by_animal_time",
+    AnimalStatusHistory.animal_id,
+    AnimalStatusHistory.status_ts.desc(),
+    postgresql_include=["status", "row_hash"],
+)
+
+# Dashboard hot path only reads currently adoptable animals; the partial index
+# is a fraction of a full index's size and stays resident in memory.
+Index(
+    "ix_status_adoptable",
+    AnimalStatusHistory.animal_id,
+    AnimalStatusHistory.status_ts,
+    postgresql_where=text("status = 'adoptable'"),
+    sqlite_where=text("status = 'adoptable'"),
+)
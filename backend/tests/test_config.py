@@ -0,0 +1,30 @@
+import os
+from collections.abc import Iterator
+
+import pytest
+
+from backend.app import config
+from backend.app.config import get_settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings() -> Iterator[None]:
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_dotenv_fills_gaps_without_touching_environ(monkeypatch: pytest.MonkeyPatch) -> None:
+    """.env values sit under the real environment and are never written into os.environ."""
+    monkeypatch.setenv("PF_CLIENT_ID", "env-id")
+    monkeypatch.delenv("PF_CLIENT_SECRET", raising=False)
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    file_values = {"PF_CLIENT_ID": "file-id", "PF_CLIENT_SECRET": "file-secret"}
+    monkeypatch.setattr(config, "dotenv_values", lambda: file_values)
+
+    settings = get_settings()
+
+    assert settings.pf_client_id == "env-id"
+    assert settings.pf_client_secret == "file-secret"
+    assert settings.database_url == "sqlite:///./local.db"
+    assert "PF_CLIENT_SECRET" not in os.environ
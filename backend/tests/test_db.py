@@ -0,0 +1,36 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy.pool import QueuePool
+
+from backend.app.config import get_settings
+from backend.app.db import _engine, get_engine
+
+
+@pytest.fixture
+def file_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("PF_CLIENT_ID", "id")
+    monkeypatch.setenv("PF_CLIENT_SECRET", "secret")
+    get_settings.cache_clear()
+    _engine.cache_clear()
+    yield
+    # the tests never connect, so dropping the cached engines is enough
+    _engine.cache_clear()
+    get_settings.cache_clear()
+
+
+def test_engine_is_shared_per_effective_config(file_db: None) -> None:
+    """Default and explicit arguments for the same config share one engine and pool."""
+    assert get_engine() is get_engine(pre_ping=True)
+    assert get_engine() is get_engine(pool_size=10, max_overflow=20)
+    assert get_engine() is not get_engine(pre_ping=False)
+
+
+def test_etl_engine_caps_pool_at_one_connection(file_db: None) -> None:
+    """pool_size=1 with max_overflow=0 really is a single pooled connection."""
+    pool = get_engine(pre_ping=False, pool_size=1, max_overflow=0).pool
+    assert isinstance(pool, QueuePool)
+    assert pool.size() == 1
+    assert pool._max_overflow == 0
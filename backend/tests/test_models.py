@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.schema import CreateIndex
+
+from backend.app.models import AnimalStatusHistory, Base
+
+
+def test_create_all_sqlite() -> None:
+    """Schema builds on SQLite; status history is indexed by (animal_id, status_ts)."""
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+
+    indexes = {ix["name"]: ix for ix in inspect(engine).get_indexes("animal_status_history")}
+    assert indexes["ix_status_by_animal_time"]["column_names"] == ["animal_id", "status_ts"]
+    # the composite index covers animal_id lookups; no separate single-column index
+    assert "ix_animal_status_history_animal_id" not in indexes
+
+
+def test_status_index_is_covering_on_postgres() -> None:
+    """Postgres DDL sorts status_ts descending and INCLUDEs status/row_hash."""
+    table = Base.metadata.tables[AnimalStatusHistory.__tablename__]
+    ix = next(i for i in table.indexes if i.name == "ix_status_by_animal_time")
+    pg = create_engine("postgresql+psycopg://").dialect  # compile only, never connects
+    ddl = str(CreateIndex(ix).compile(dialect=pg))
+    assert "status_ts DESC" in ddl
+    assert "INCLUDE (status, row_hash)" in ddl
+
+
+def test_adoptable_partial_index() -> None:
+    """The adoptable-only index carries a WHERE clause on Postgres and SQLite."""
+    table = Base.metadata.tables[AnimalStatusHistory.__tablename__]
+    ix = next(i for i in table.indexes if i.name == "ix_status_adoptable")
+    for url in ("postgresql+psycopg://", "sqlite://"):
+        ddl = str(CreateIndex(ix).compile(dialect=create_engine(url).dialect))
+        assert "WHERE status = 'adoptable'" in ddl
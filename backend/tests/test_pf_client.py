@@ -2,13 +2,18 @@
 from __future__ import annotations
 
 import time as _time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 
 import pytest
 import requests
 import responses
+from requests.adapters import HTTPAdapter
+from responses import matchers
 
+from backend.app import config, pf_client
+from backend.app.config import get_settings
 from backend.app.pf_client import (
     PetfinderClient,
     PetfinderAuthError,
@@ -33,20 +38,38 @@ def _animals_page(ids: Iterator[int] | list[int], current: int, total: int) -> d
 
 
 @pytest.fixture
-def creds_env(monkeypatch: pytest.MonkeyPatch) -> None:
+def creds_env(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
     monkeypatch.setenv("PF_CLIENT_ID", "id")
     monkeypatch.setenv("PF_CLIENT_SECRET", "secret")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
 
 
 # ---------- tests ----------
 
 
-def test_missing_credentials_raises() -> None:
+def test_missing_credentials_raises(monkeypatch: pytest.MonkeyPatch) -> None:
     """Raise PetfinderAuthError when no client ID/secret provided."""
+    monkeypatch.delenv("PF_CLIENT_ID", raising=False)
+    monkeypatch.delenv("PF_CLIENT_SECRET", raising=False)
+    monkeypatch.setattr(config, "dotenv_values", lambda: {})  # ignore a developer's .env
+    get_settings.cache_clear()
     with pytest.raises(PetfinderAuthError):
         PetfinderClient(client_id=None, client_secret=None)
 
 
+def test_session_retries_rate_limits(creds_env: None) -> None:
+    """Mount a pooled adapter that retries 429/5xx for API calls."""
+    c = PetfinderClient()
+    adapter = c._session.get_adapter(BASE_URL)
+    assert isinstance(adapter, HTTPAdapter)
+    retries = adapter.max_retries
+    assert retries.total == 5
+    assert 429 in (retries.status_forcelist or ())
+    assert retries.respect_retry_after_header
+
+
 @responses.activate
 def test_fetch_token_and_reuse(creds_env: None, monkeypatch: pytest.MonkeyPatch) -> None:
     """Fetch token once, reuse if >60s remain, refresh if <60s remain."""
@@ -54,7 +77,7 @@ def test_fetch_token_and_reuse(creds_env: None, monkeypatch: pytest.MonkeyPatch)
     # Freeze time to test expiry logic
     t0: float = 1_000_000.0
     now = t0
-    monkeypatch.setattr(_time, "time", lambda: now)
+    monkeypatch.setattr(_time, "monotonic", lambda: now)
 
     # 1) initial token
     responses.add(
@@ -85,7 +108,7 @@ def test_fetch_token_and_reuse(creds_env: None, monkeypatch: pytest.MonkeyPatch)
     # a) Reuse while > 60s remain:
     #    Move to 90s before expiry => should NOT refresh
     now = t0 + 3600 - 90
-    monkeypatch.setattr(_time, "time", lambda: now)
+    monkeypatch.setattr(_time, "monotonic", lambda: now)
     _ = c.get_types()
     assert len([r for r in responses.calls if r.request.method == "POST"]) == 1  # still 1
 
@@ -104,7 +127,7 @@ def test_fetch_token_and_reuse(creds_env: None, monkeypatch: pytest.MonkeyPatch)
         status=200,
     )
     now = t0 + 3600 - 30
-    monkeypatch.setattr(_time, "time", lambda: now)
+    monkeypatch.setattr(_time, "monotonic", lambda: now)
     _ = c.get_types()
     assert len([r for r in responses.calls if r.request.method == "POST"]) == 2  # refreshed
 
@@ -115,7 +138,7 @@ def test_token_refresh_on_expiry(creds_env: None, monkeypatch: pytest.MonkeyPatc
 
     t0: float = 1_000_000.0
     now: float = t0
-    monkeypatch.setattr(_time, "time", lambda: now)
+    monkeypatch.setattr(_time, "monotonic", lambda: now)
 
     responses.add(
         responses.POST,
@@ -136,7 +159,7 @@ def test_token_refresh_on_expiry(creds_env: None, monkeypatch: pytest.MonkeyPatc
     _ = c.get_types()  # uses token A (trigger API call, exercise token logic)
     # advance time beyond expiry - 60 buffer => force refresh
     now = t0 + 61
-    monkeypatch.setattr(_time, "time", lambda: now)
+    monkeypatch.setattr(_time, "monotonic", lambda: now)
     _ = c.get_types()  # should fetch token B (trigger API call, exercise token logic)
 
     posts = [r for r in responses.calls if r.request.method == "POST"]
@@ -178,6 +201,21 @@ def test_401_triggers_single_refresh(creds_env: None) -> None:
     assert len([r for r in responses.calls if r.request.method == "POST"]) == 2
 
 
+@responses.activate
+def test_stale_401_keeps_newer_token(creds_env: None) -> None:
+    """A late 401 for an old token must not discard one another thread already refreshed."""
+
+    responses.add(responses.POST, f"{BASE_URL}/oauth2/token", json=_token_json("B"), status=200)
+    c = PetfinderClient()
+    assert c._ensure_token() == "B"
+
+    c._invalidate_token("A")  # 401 from a request that still carried token A
+    assert c._ensure_token() == "B"
+    c._invalidate_token("B")
+    assert c._token is None
+    assert len([r for r in responses.calls if r.request.method == "POST"]) == 1
+
+
 @responses.activate
 def test_headers_include_bearer_token(creds_env: None) -> None:
     """Include Authorization header with Bearer token in requests."""
@@ -229,6 +267,70 @@ def test_iter_animals_paginates(creds_env: None) -> None:
     assert [a["id"] for a in out] == [1, 2, 3]
 
 
+@responses.activate
+def test_iter_animals_prefetches_pages_in_order(creds_env: None) -> None:
+    """Fetch pages 2..N concurrently but yield animals in page order."""
+
+    responses.add(responses.POST, f"{BASE_URL}/oauth2/token", json=_token_json(), status=200)
+    for page, ids in enumerate([[1, 2], [3, 4], [5], [6]], start=1):
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/animals",
+            json=_animals_page(ids, page, 4),
+            status=200,
+            match=[matchers.query_param_matcher({"page": str(page)}, strict_match=False)],
+        )
+
+    c = PetfinderClient(page_concurrency=3)
+    out = list(c.iter_animals(type="dog"))
+    assert [a["id"] for a in out] == [1, 2, 3, 4, 5, 6]
+    assert len([r for r in responses.calls if r.request.method == "POST"]) == 1
+
+
+@responses.activate
+def test_iter_animals_bounds_pages_in_flight(
+    creds_env: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Request a new page only once the oldest in-flight page is fully consumed."""
+
+    # submit() runs on the consuming thread, so recording it is deterministic
+    # (unlike counting HTTP calls, which worker threads make on their own schedule)
+    submitted: list[int] = []
+
+    class _RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future[Any]:
+            submitted.extend(a["page"] for a in args if isinstance(a, dict))
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(pf_client, "ThreadPoolExecutor", _RecordingPool)
+
+    responses.add(responses.POST, f"{BASE_URL}/oauth2/token", json=_token_json(), status=200)
+    pages = {1: [1], 2: [21, 22], 3: [3], 4: [4], 5: [5]}
+    for page, ids in pages.items():
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/animals",
+            json=_animals_page(ids, page, len(pages)),
+            status=200,
+            match=[matchers.query_param_matcher({"page": str(page)}, strict_match=False)],
+        )
+
+    c = PetfinderClient(page_concurrency=2)
+    it = c.iter_animals(type="dog")
+    assert next(it)["id"] == 1
+    assert submitted == []  # page 1 is fetched inline
+
+    assert next(it)["id"] == 21
+    assert submitted == [2, 3]  # window of two
+    assert next(it)["id"] == 22
+    assert submitted == [2, 3]  # page 2 still being consumed: page 4 must wait
+
+    assert next(it)["id"] == 3
+    assert submitted == [2, 3, 4]  # page 2 drained, so page 4 joins the window
+    assert [a["id"] for a in it] == [4, 5]
+    assert submitted == [2, 3, 4, 5]
+
+
 @responses.activate
 def test_iter_animals_empty_and_missing_keys(creds_env: None) -> None:
     """Handle missing 'animals' or 'pagination' keys gracefully."""
@@ -1,9 +1,9 @@
 # Minimal ETL placeholder: proves wiring works.
-from backend.app.db import SessionLocal
+from backend.app.db import get_engine
 
 
 def run_once() -> None:
-    with SessionLocal() as _:
+    with get_engine(pre_ping=False, pool_size=1, max_overflow=0).connect() as _:
         print("ETL OK (placeholder)")
 
 
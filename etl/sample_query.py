@@ -2,16 +2,21 @@
 from __future__ import annotations
 
 import datetime as dt
-import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cache, lru_cache
+from itertools import islice
+from types import MappingProxyType
 from typing import Any
+from collections.abc import Callable, Iterable, Iterator, Mapping
 
-from sqlalchemy import bindparam, text
-from sqlalchemy.types import DateTime
-from sqlalchemy.sql.elements import TextClause
+from sqlalchemy import Column, Integer, MetaData, Table, Text, text
+from sqlalchemy.dialects.postgresql import Insert as PgInsert, insert as pg_insert
+from sqlalchemy.dialects.sqlite import Insert as SqliteInsert, insert as sqlite_insert
+from sqlalchemy.types import DateTime, TypeDecorator
 from sqlalchemy.orm import Session
-from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.engine import Engine, Connection, Dialect
 
-from backend.app.db import SessionLocal
+from backend.app.db import get_engine
 from backend.app.pf_client import PetfinderClient
 
 
@@ -34,12 +39,15 @@ CREATE TABLE IF NOT EXISTS tmp_animals_sample (
 """
 
 
+@lru_cache(maxsize=8192)
 def parse_petfinder_ts(ts: str | None) -> dt.datetime | None:
     """
     Convert a Petfinder API timestamp into a UTC, timezone-aware datetime.
 
-    Normalizes offsets like ``+0000`` -> ``+00:00`` (and any ±HHMM) then returns
-    a datetime aware of UTC.
+    Python 3.11's ``fromisoformat`` accepts compact offsets (``+0000``, any
+    ±HHMM) and ``Z`` directly, so no string normalization is needed. Results
+    are memoized: timestamps repeat heavily within a batch and the returned
+    datetimes are immutable.
 
     Args:
         ts: Timestamp string from the API (e.g. "2025-01-12T05:19:52+0000") or None.
@@ -49,107 +57,269 @@ def parse_petfinder_ts(ts: str | None) -> dt.datetime | None:
     """
     if not ts:
         return None
-    # Normalize +HHMM/-HHMM at end of string to +HH:MM/-HH:MM
-    norm = re.sub(r"([+-]\d{2})(\d{2})$", r"\1:\2", ts.strip())
-    dt_obj = dt.datetime.fromisoformat(norm)  # tz-aware
+    dt_obj = dt.datetime.fromisoformat(ts.strip())  # tz-aware
     return dt_obj.astimezone(dt.timezone.utc)
 
 
-def _row(a: dict[str, Any]) -> dict[str, Any]:
+class PetfinderTimestamp(TypeDecorator[dt.datetime]):
+    """
+    TIMESTAMPTZ column that also accepts raw Petfinder timestamp strings.
+
+    Postgres receives the string unchanged and parses it server-side in its
+    own C parser (it accepts ``+0000`` offsets). Other dialects need a Python
+    datetime, so strings are parsed with ``parse_petfinder_ts`` at bind time.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Any:
+        if isinstance(value, str) and dialect.name != "postgresql":
+            return parse_petfinder_ts(value)
+        return value
+
+
+# Core mirror of DDL, used to build dialect-specific UPSERT statements
+metadata = MetaData()
+tmp_animals_sample = Table(
+    "tmp_animals_sample",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", Text),
+    Column("type", Text),
+    Column("age", Text),
+    Column("gender", Text),
+    Column("status", Text),
+    Column("org_id", Text),
+    Column("city", Text),
+    Column("state", Text),
+    Column("published_at", PetfinderTimestamp),
+    Column("status_changed_at", PetfinderTimestamp),
+    Column("fetched_at", DateTime(timezone=True)),
+)
+_UPDATE_COLS = tuple(c.name for c in tmp_animals_sample.c if not c.primary_key)
+
+# Rows buffered from the API iterator per executemany batch
+UPSERT_BATCH_SIZE = 1000
+
+# Postgres bulk path: COPY each batch into a transaction-scoped stage table, then
+# merge once. DISTINCT ON keeps one row per id when pages overlap.
+_COLS = ", ".join(c.name for c in tmp_animals_sample.c)
+STAGE_DDL = """
+CREATE TEMP TABLE tmp_animals_sample_stage
+(LIKE tmp_animals_sample INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+COPY_SQL = f"COPY tmp_animals_sample_stage ({_COLS}) FROM STDIN"
+MERGE_SQL = f"""
+INSERT INTO tmp_animals_sample ({_COLS})
+SELECT DISTINCT ON (id) {_COLS}
+FROM tmp_animals_sample_stage
+ORDER BY id, status_changed_at DESC NULLS LAST
+ON CONFLICT (id) DO UPDATE SET
+  {", ".join(f"{c}=EXCLUDED.{c}" for c in _UPDATE_COLS)}
+"""
+
+
+# Shared read-only stand-in for missing nested objects (no per-row {} allocation)
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+def _row(a: dict[str, Any], fetched_at: dt.datetime) -> dict[str, Any]:
     """
     Transform a Petfinder animal record into a DB-ready row.
 
-    Timestamps are converted to timezone-aware UTC datetimes for insertion
-    into TIMESTAMPTZ/DATETIME columns.
+    Petfinder timestamps are passed through as raw ISO strings; the
+    ``PetfinderTimestamp`` column type (or Postgres itself, on the COPY path)
+    turns them into TIMESTAMPTZ values, so nothing is parsed here.
 
     Args:
         a: Raw animal JSON object from the Petfinder API.
+        fetched_at: UTC time of this ETL run, shared by every row it loads.
 
     Returns:
         Mapping of column names to values for insertion.
     """
-    contact = a.get("contact") or {}
-    address = contact.get("address") or {}
+    get = a.get  # bound once; called for every field below
+    address = (get("contact") or _EMPTY).get("address") or _EMPTY
 
     return {
         "id": a["id"],
-        "name": a.get("name"),
-        "type": a.get("type"),
-        "age": a.get("age"),
-        "gender": a.get("gender"),
-        "status": a.get("status"),
-        "org_id": a.get("organization_id"),
+        "name": get("name"),
+        "type": get("type"),
+        "age": get("age"),
+        "gender": get("gender"),
+        "status": get("status"),
+        "org_id": get("organization_id"),
         "city": address.get("city"),
         "state": address.get("state"),
-        "published_at": parse_petfinder_ts(a.get("published_at")),
-        "status_changed_at": parse_petfinder_ts(a.get("status_changed_at")),
-        "fetched_at": dt.datetime.now(dt.timezone.utc),
+        "published_at": get("published_at") or None,
+        "status_changed_at": get("status_changed_at") or None,
+        "fetched_at": fetched_at,
     }
 
 
-def build_upsert_sql(dialect_name: str) -> str:
-    """
-    Return an INSERT..ON CONFLICT statement tailored to the DB dialect.
+def chunks(rows: Iterable[dict[str, Any]], n: int) -> Iterator[list[dict[str, Any]]]:
+    """Yield successive lists of at most ``n`` rows without materializing ``rows``."""
+    it = iter(rows)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def _on_conflict_update(stmt: PgInsert | SqliteInsert) -> PgInsert | SqliteInsert:
+    """Attach ``ON CONFLICT (id) DO UPDATE`` overwriting every non-key column."""
+    return stmt.on_conflict_do_update(
+        index_elements=[tmp_animals_sample.c.id],
+        set_={c: stmt.excluded[c] for c in _UPDATE_COLS},
+    )
+
 
-    For Postgres, cast datetime parameters to TIMESTAMPTZ explicitly.
-    SQLite path omits casts (SQLite ignores types but round-trips ISO8601).
+@cache
+def _upsert_stmt(dialect_name: str) -> PgInsert | SqliteInsert:
+    """Build the UPSERT construct once per dialect.
+
+    Reusing the same construct lets SQLAlchemy's compiled-statement cache hit on
+    every later execute instead of regenerating and re-keying the SQL.
     """
     if dialect_name == "postgresql":
-        return """
-        INSERT INTO tmp_animals_sample
-        (id, name, type, age, gender, status, org_id, city, state,
-         published_at, status_changed_at, fetched_at)
-        VALUES
-        (:id, :name, :type, :age, :gender, :status, :org_id, :city, :state,
-         (:published_at)::timestamptz,
-         (:status_changed_at)::timestamptz,
-         (:fetched_at)::timestamptz)
-        ON CONFLICT (id) DO UPDATE SET
-          name=EXCLUDED.name,
-          type=EXCLUDED.type,
-          age=EXCLUDED.age,
-          gender=EXCLUDED.gender,
-          status=EXCLUDED.status,
-          org_id=EXCLUDED.org_id,
-          city=EXCLUDED.city,
-          state=EXCLUDED.state,
-          published_at=EXCLUDED.published_at,
-          status_changed_at=EXCLUDED.status_changed_at,
-          fetched_at=EXCLUDED.fetched_at
-        """
-    # SQLite / others (no casts)
-    return """
-    INSERT INTO tmp_animals_sample
-    (id, name, type, age, gender, status, org_id, city, state,
-     published_at, status_changed_at, fetched_at)
-    VALUES
-    (:id, :name, :type, :age, :gender, :status, :org_id, :city, :state,
-     :published_at, :status_changed_at, :fetched_at)
-    ON CONFLICT(id) DO UPDATE SET
-      name=excluded.name,
-      type=excluded.type,
-      age=excluded.age,
-      gender=excluded.gender,
-      status=excluded.status,
-      org_id=excluded.org_id,
-      city=excluded.city,
-      state=excluded.state,
-      published_at=excluded.published_at,
-      status_changed_at=excluded.status_changed_at,
-      fetched_at=excluded.fetched_at
+        return _on_conflict_update(pg_insert(tmp_animals_sample))
+    if dialect_name == "sqlite":
+        return _on_conflict_update(sqlite_insert(tmp_animals_sample))
+    raise ValueError(
+        f"Unsupported dialect for UPSERT: {dialect_name!r} (supported: postgresql, sqlite)"
+    )
+
+
+def upsert_stmt_for(db: Session | Connection) -> PgInsert | SqliteInsert:
     """
+    Return the dialect-aware INSERT..ON CONFLICT statement for a Session or Core Connection.
 
+    Execute it with a list of rows to get a driver-level executemany.
 
-def upsert_stmt_for(db: Session) -> TextClause:
-    """Build a typed, dialect-aware UPSERT statement for the current DB session."""
-    bind: Engine | Connection = db.get_bind()
-    dialect_name = bind.dialect.name
-    sql = build_upsert_sql(dialect_name)
-    return text(sql).bindparams(
-        bindparam("published_at", type_=DateTime(timezone=True)),
-        bindparam("status_changed_at", type_=DateTime(timezone=True)),
-        bindparam("fetched_at", type_=DateTime(timezone=True)),
-    )
+    Raises:
+        ValueError: If the bound dialect is neither postgresql nor sqlite.
+    """
+    bind: Engine | Connection = db if isinstance(db, Connection) else db.get_bind()
+    return _upsert_stmt(bind.dialect.name)
+
+
+def upsert_rows(
+    db: Session | Connection,
+    rows: Iterable[dict[str, Any]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> int:
+    """
+    Upsert ``rows`` into tmp_animals_sample in batches of ``batch_size``.
+
+    Every batch reuses the cached Core statement from ``upsert_stmt_for`` as an
+    executemany, so SQLAlchemy's statement cache and the driver's batching
+    (psycopg pipeline mode, sqlite3's C executemany) do the work; only the
+    buffering of the incoming iterator is done here. The caller owns the
+    transaction.
+
+    Returns:
+        Number of rows written.
+    """
+    stmt = upsert_stmt_for(db)
+    loaded = 0
+    for chunk in chunks(rows, batch_size):
+        db.execute(stmt, chunk)
+        loaded += len(chunk)
+    return loaded
+
+
+def etl_session() -> Session:
+    """Open a Session on the ETL engine: one pooled connection, no pre-ping."""
+    return Session(bind=get_engine(pre_ping=False, pool_size=1, max_overflow=0), autoflush=False)
+
+
+def copy_to_stage(db: Session, rows: Iterable[dict[str, Any]]) -> int:
+    """
+    Stream ``rows`` into tmp_animals_sample_stage with Postgres ``COPY FROM STDIN``.
+
+    COPY skips per-statement parsing and planning entirely; run ``MERGE_SQL``
+    in the same transaction to upsert the staged rows.
+
+    Returns:
+        Number of rows copied.
+
+    Raises:
+        RuntimeError: If the Session's pooled connection has no live DBAPI connection.
+    """
+    names = [c.name for c in tmp_animals_sample.c]
+    raw = db.connection().connection.driver_connection  # psycopg.Connection
+    if raw is None:
+        raise RuntimeError("COPY needs a live DBAPI connection; the pooled one was invalidated")
+    copied = 0
+    with raw.cursor() as cur, cur.copy(COPY_SQL) as copy:
+        for r in rows:
+            copy.write_row([r[n] for n in names])
+            copied += 1
+    return copied
+
+
+_Writer = Callable[[Session, list[dict[str, Any]]], int]
+
+
+def _begin_load(db: Session) -> _Writer:
+    """Create the target table (and the Postgres stage table); return the chunk writer."""
+    db.execute(text(DDL))
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(STAGE_DDL))
+        return copy_to_stage
+    return upsert_rows
+
+
+def _finish_load(db: Session) -> None:
+    """Merge staged rows (Postgres only) and commit the load's single transaction."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(MERGE_SQL))
+    db.commit()
+
+
+def stream_load(
+    rows: Iterable[dict[str, Any]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+    session_factory: Callable[[], Session] = etl_session,
+) -> int:
+    """
+    Upsert ``rows`` as they arrive, writing every ``batch_size`` rows.
+
+    Writes run on a single background thread so the DB write for one chunk
+    overlaps with fetching the next (``requests`` releases the GIL on socket
+    reads). At most one chunk is in flight, so memory stays O(batch_size)
+    rather than O(total rows). All chunks share one connection and one
+    transaction, committed once at the end. A failed write is re-raised here.
+
+    The Session is opened, used, committed and closed only on the writer
+    thread, so its DBAPI connection never crosses threads (sqlite3 rejects
+    that, and in-memory SQLite hands each thread its own database).
+
+    The target table is created if missing. On Postgres each chunk is COPYed
+    into a temp stage table and merged with a single INSERT..SELECT..ON CONFLICT
+    at the end. On SQLite chunks are upserted directly; connection PRAGMAs are
+    left untouched, since the single commit already limits the load to one
+    journal sync.
+
+    Returns:
+        Number of rows written.
+    """
+    loaded = 0
+    pending: Future[int] | None = None
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="etl-writer") as pool:
+        db = pool.submit(session_factory).result()
+        try:
+            write = pool.submit(_begin_load, db).result()
+            for chunk in chunks(rows, batch_size):
+                if pending is not None:
+                    loaded += pending.result()
+                pending = pool.submit(write, db, chunk)
+            if pending is not None:
+                loaded += pending.result()
+            pool.submit(_finish_load, db).result()
+        finally:
+            # queued behind any in-flight write; rolls back if the load did not commit
+            pool.submit(db.close).result()
+    return loaded
 
 
 def main() -> None:
@@ -169,22 +339,15 @@ def main() -> None:
     start = dt.datetime.now(dt.timezone.utc)
 
     client = PetfinderClient()
-    rows: list[dict[str, Any]] = [_row(a) for a in client.iter_animals(**PARAMS)]
-    print(f"[etl] fetched={len(rows)} params={PARAMS}")
+    rows = (_row(a, start) for a in client.iter_animals(**PARAMS))
+    loaded = stream_load(rows)  # creates tmp_animals_sample if missing
 
-    if not rows:
-        print("[etl] nothing to load; exiting")
+    if not loaded:
+        print(f"[etl] nothing to load; params={PARAMS}")
         return
 
-    with SessionLocal() as db:
-        db.execute(text(DDL))
-        stmt = upsert_stmt_for(db)
-        # executemany for speed
-        db.execute(stmt, rows)
-        db.commit()
-
     dur = (dt.datetime.now(dt.timezone.utc) - start).total_seconds()
-    print(f"[etl] loaded={len(rows)} table=tmp_animals_sample in {dur:.2f}s")
+    print(f"[etl] loaded={loaded} table=tmp_animals_sample in {dur:.2f}s")
 
 
 if __name__ == "__main__":
@@ -1,122 +1,368 @@
 # etl/tests/test_sample_query.py
-import copy
 import datetime as dt
-from typing import Any
+from contextlib import nullcontext
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
 from collections.abc import Iterator
 import pytest
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import Connection, Engine, Insert, create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
-from etl.sample_query import _row, DDL, upsert_stmt_for
+from etl.sample_query import (
+    _row,
+    _UPDATE_COLS,
+    _upsert_stmt,
+    COPY_SQL,
+    DDL,
+    MERGE_SQL,
+    STAGE_DDL,
+    copy_to_stage,
+    parse_petfinder_ts,
+    tmp_animals_sample,
+    stream_load,
+    upsert_rows,
+    upsert_stmt_for,
+)
 from etl.tests.sample_animals import sample_animals
 
+_UTC = dt.timezone.utc  # bound once; used by as_utc_dt and every assertion
+_ZERO = dt.timedelta(0)
+
+FETCHED_AT = dt.datetime(2025, 9, 1, tzinfo=_UTC)
+# _row is pure and the driver never mutates parameter dicts, so build once
+SAMPLE_ROWS = [_row(a, FETCHED_AT) for a in sample_animals]
+
 
 def as_utc_dt(value: Any) -> dt.datetime:
     """
     Coerce DB-returned timestamp into a tz-aware UTC datetime.
-    - SQLite may return strings like 'YYYY-MM-DD HH:MM:SS(.ffffff)'
+    - SQLite may return strings like 'YYYY-MM-DD HH:MM:SS(.ffffff)' (no offset = UTC)
     - Postgres returns tz-aware datetimes
     """
     if isinstance(value, dt.datetime):
         # ensure UTC awareness
-        return value if value.tzinfo else value.replace(tzinfo=dt.timezone.utc)
+        return value if value.tzinfo else value.replace(tzinfo=_UTC)
     if isinstance(value, str):
-        s = value.strip()
-        # add a 'T' to satisfy fromisoformat if needed
-        if "T" not in s and " " in s:
-            s = s.replace(" ", "T", 1)
-        # add +00:00 if no offset present
-        if s[-6] not in "+-" and not s.endswith("Z"):
-            s = s + "+00:00"
-        return dt.datetime.fromisoformat(s).astimezone(dt.timezone.utc)
+        # 3.11+ fromisoformat accepts ' '/'T', any fraction, 'Z' and ±HHMM offsets
+        parsed = dt.datetime.fromisoformat(value.strip())
+        offset = parsed.utcoffset()
+        if offset is None or offset == _ZERO:
+            return parsed.replace(tzinfo=_UTC)  # already UTC: no conversion
+        return parsed.astimezone(_UTC)
     raise TypeError(f"Unexpected timestamp type: {type(value)}")
 
 
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("2025-08-16 12:28:02.000000", dt.datetime(2025, 8, 16, 12, 28, 2, tzinfo=_UTC)),
+        (
+            "2025-08-16T12:28:02.5Z",
+            dt.datetime(2025, 8, 16, 12, 28, 2, 500000, tzinfo=_UTC),
+        ),
+        ("2025-08-16 07:28:02-05:00", dt.datetime(2025, 8, 16, 12, 28, 2, tzinfo=_UTC)),
+        ("2025-08-16T14:28:02+0200", dt.datetime(2025, 8, 16, 12, 28, 2, tzinfo=_UTC)),
+    ],
+)
+def test_as_utc_dt_parses_db_text(raw: str, expected: dt.datetime) -> None:
+    """Helper handles the text forms SQLite/Postgres return, normalizing to UTC."""
+    assert as_utc_dt(raw) == expected
+    assert as_utc_dt(raw).tzinfo == _UTC
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("2025-01-12T05:19:52+0000", dt.datetime(2025, 1, 12, 5, 19, 52, tzinfo=_UTC)),
+        ("2025-01-12T05:19:52Z", dt.datetime(2025, 1, 12, 5, 19, 52, tzinfo=_UTC)),
+        ("2025-01-12T00:19:52-0500", dt.datetime(2025, 1, 12, 5, 19, 52, tzinfo=_UTC)),
+        (
+            " 2025-01-12T05:19:52+00:00 ",
+            dt.datetime(2025, 1, 12, 5, 19, 52, tzinfo=_UTC),
+        ),
+        (None, None),
+        ("", None),
+    ],
+)
+def test_parse_petfinder_ts_offsets(raw: str | None, expected: dt.datetime | None) -> None:
+    """Accept compact, colon and Z offsets; always return UTC."""
+    parsed = parse_petfinder_ts(raw)
+    assert parsed == expected
+    if parsed is not None:
+        assert parsed.tzinfo == _UTC
+
+
+def test_row_passes_raw_timestamps_through() -> None:
+    """Timestamps stay API strings in the row; parsing happens at bind/DB time."""
+    a = sample_animals[0]
+    r = _row(a, FETCHED_AT)
+    assert r["published_at"] == a["published_at"]
+    assert r["status_changed_at"] is None
+    assert r["fetched_at"] is FETCHED_AT
+
+
+def test_row_reads_nested_address() -> None:
+    """City/state come from contact.address; missing or null contact yields None."""
+    base = sample_animals[0]
+    contact = {"address": {"city": "Austin", "state": "TX"}}
+    with_addr = _row({**base, "contact": contact}, FETCHED_AT)
+    assert (with_addr["city"], with_addr["state"]) == ("Austin", "TX")
+    for missing in (None, {}, {"address": None}):
+        r = _row({**base, "contact": missing}, FETCHED_AT)
+        assert (r["city"], r["state"]) == (None, None)
+
+
+def _memory_engine() -> Engine:
+    """Fresh in-memory DB with tmp_animals_sample created."""
+    # StaticPool keeps the single :memory: connection alive (and reachable from
+    # the ETL writer thread) for the engine's lifetime
+    e = create_engine(
+        "sqlite:///:memory:",
+        future=True,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(e, "connect")
+    def _set_pragmas(dbapi_conn: Any, _: Any) -> None:
+        # throwaway :memory: DB: no durability needed, skip journaling/sync work
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA synchronous=OFF")
+        cur.execute("PRAGMA journal_mode=MEMORY")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
+    with e.begin() as conn:
+        conn.execute(text(DDL))
+    return e
+
+
+@pytest.fixture(scope="session")
+def engine() -> Engine:
+    """One in-memory DB with the table created once for the whole run."""
+    return _memory_engine()
+
+
 @pytest.fixture
-def in_memory_db() -> Iterator[Session]:
-    engine = create_engine("sqlite:///:memory:", future=True)
-    SessionLocal = sessionmaker(bind=engine, future=True)
-    with SessionLocal() as session:
-        session.execute(text(DDL))
-        yield session
+def in_memory_db(engine: Engine) -> Iterator[Connection]:
+    """Core connection: the tests only run text()/Insert statements, no ORM objects."""
+    with engine.connect() as conn:
+        yield conn
+        # reset rows instead of rebuilding the DB for the next test
+        conn.rollback()
+        conn.execute(text("DELETE FROM tmp_animals_sample"))
+        conn.commit()
 
 
-def test_insert_sample_animals(in_memory_db: Session) -> None:
-    """Smoke: insert all fixtures, verify count and UTC-aware datetimes."""
-    stmt = upsert_stmt_for(in_memory_db)
-    for a in sample_animals:
-        in_memory_db.execute(stmt, _row(a))
-    in_memory_db.commit()
+@pytest.fixture(scope="session")
+def upsert_stmt(engine: Engine) -> Insert:
+    """SQLite UPSERT built once from the shared test engine and reused by every test."""
+    with engine.connect() as conn:
+        return upsert_stmt_for(conn)
 
-    rows = in_memory_db.execute(
-        text("SELECT id, name, published_at FROM tmp_animals_sample ORDER BY id")
-    ).fetchall()
 
-    assert len(rows) == len(sample_animals)
-    for r in rows:
-        # SQLite returns tuples by default: (id, name, published_at)
-        pub = as_utc_dt(r.published_at if hasattr(r, "published_at") else r[2])
-        assert isinstance(pub, dt.datetime)
-        assert pub.tzinfo == dt.timezone.utc
+@pytest.fixture
+def seeded_db(in_memory_db: Connection, upsert_stmt: Insert) -> Connection:
+    """Connection whose table already holds every sample animal, committed."""
+    with in_memory_db.begin():
+        in_memory_db.execute(upsert_stmt, SAMPLE_ROWS)
+    return in_memory_db
+
+
+def test_upsert_stmt_is_built_once_per_dialect(in_memory_db: Connection) -> None:
+    """Reuse the same statement object so SQLAlchemy's compiled cache hits."""
+    assert upsert_stmt_for(in_memory_db) is upsert_stmt_for(in_memory_db)
+
+
+def test_upsert_stmt_rejects_unsupported_dialect() -> None:
+    """Dialects without ON CONFLICT fail loudly, naming the supported ones."""
+    with pytest.raises(ValueError, match="postgresql, sqlite"):
+        _upsert_stmt("mysql")
 
-    # Check a known row (Shelina)
-    shelina = next(r for r in rows if (r.id if hasattr(r, "id") else r[0]) == 77813886)
-    s_pub = as_utc_dt(shelina.published_at if hasattr(shelina, "published_at") else shelina[2])
-    assert s_pub == dt.datetime(2025, 8, 16, 12, 28, 2, tzinfo=dt.timezone.utc)
+
+def test_insert_sample_animals(seeded_db: Connection) -> None:
+    """Smoke: insert all fixtures, verify count and UTC-aware datetimes."""
+    count = seeded_db.execute(text("SELECT COUNT(*) FROM tmp_animals_sample")).scalar_one()
+    assert count == len(sample_animals)
+
+    # Check a known row (Shelina) round-trips as a UTC-aware datetime
+    shelina = (
+        seeded_db.execute(
+            text("SELECT published_at FROM tmp_animals_sample WHERE id = :id"),
+            {"id": 77813886},
+        )
+        .mappings()
+        .one()
+    )
+    pub = as_utc_dt(shelina["published_at"])
+    assert pub.tzinfo == _UTC
+    assert pub == dt.datetime(2025, 8, 16, 12, 28, 2, tzinfo=_UTC)
 
 
-def test_upsert_updates_existing_rows(in_memory_db: Session) -> None:
+def test_upsert_updates_existing_rows(seeded_db: Connection, upsert_stmt: Insert) -> None:
     """
     Inserting again with the same ID but different values should UPDATE the row,
     not create a duplicate.
     """
-    stmt = upsert_stmt_for(in_memory_db)
+    # 1) Modify one record (same id) and upsert only that record again
+    # Pick Shelina (id=77813886): change status + published_at; fixtures stay untouched
+    shelina = next(a for a in sample_animals if a["id"] == 77813886)
+    modified_rec = {
+        **shelina,
+        "status": "adopted",
+        "published_at": "2025-08-17T00:00:00+0000",  # next day UTC
+        "name": "Shelina (Updated)",
+    }
+
+    with seeded_db.begin():
+        seeded_db.execute(upsert_stmt, [_row(modified_rec, FETCHED_AT)])
+
+    # 2) Assert row count unchanged (no duplicate IDs); seeded_db holds every sample
+    after_count = seeded_db.execute(text("SELECT COUNT(*) FROM tmp_animals_sample")).scalar_one()
+    assert after_count == len(sample_animals)
+
+    # 3) Assert the targeted row was actually updated
+    name, status, pub = seeded_db.execute(
+        text("SELECT name, status, published_at FROM tmp_animals_sample WHERE id = :id"),
+        {"id": 77813886},
+    ).one()
+
+    assert name == "Shelina (Updated)"
+    assert status == "adopted"
+    assert as_utc_dt(pub) == dt.datetime(2025, 8, 17, 0, 0, tzinfo=_UTC)
 
-    # 1) Initial load
-    for a in sample_animals:
-        in_memory_db.execute(stmt, _row(a))
-    in_memory_db.commit()
 
-    # Baseline counts
-    before_count = in_memory_db.execute(
-        text("SELECT COUNT(*) FROM tmp_animals_sample")
-    ).scalar_one()
-
-    # 2) Modify one record (same id) and upsert again
-    modified = copy.deepcopy(sample_animals)
-    # Pick Shelina (id=77813886): change status + published_at
-    for rec in modified:
-        if rec["id"] == 77813886:
-            rec["status"] = "adopted"
-            rec["published_at"] = "2025-08-17T00:00:00+0000"  # next day UTC
-            rec["name"] = "Shelina (Updated)"
-            break
-
-    for a in modified:
-        in_memory_db.execute(stmt, _row(a))
+def test_upsert_rows_streams_in_batches(in_memory_db: Connection) -> None:
+    """Load a one-shot iterator of rows across several batches, including a partial tail."""
+    loaded = upsert_rows(in_memory_db, iter(SAMPLE_ROWS), batch_size=2)
     in_memory_db.commit()
 
-    # 3) Assert row count unchanged (no duplicate IDs)
-    after_count = in_memory_db.execute(text("SELECT COUNT(*) FROM tmp_animals_sample")).scalar_one()
-    assert after_count == before_count
-
-    # 4) Assert the targeted row was actually updated
-    row = (
-        in_memory_db.execute(
-            text(
-                """
-            SELECT id, name, status, published_at
-            FROM tmp_animals_sample
-            WHERE id = :id
-        """
+    assert loaded == len(sample_animals)
+    count = in_memory_db.execute(text("SELECT COUNT(*) FROM tmp_animals_sample")).scalar_one()
+    assert count == len(sample_animals)
+
+
+def test_stream_load_writes_all_chunks() -> None:
+    """Writer thread writes every chunk; all rows are committed once loading returns."""
+    # own engine: the loader's Session must not share a DBAPI connection with in_memory_db
+    load_engine = _memory_engine()
+    factory = sessionmaker(bind=load_engine, future=True)
+    loaded = stream_load(iter(SAMPLE_ROWS), batch_size=2, session_factory=factory)
+
+    assert loaded == len(sample_animals)
+    with load_engine.connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM tmp_animals_sample")).scalar_one()
+    assert count == len(sample_animals)
+    load_engine.dispose()
+
+
+def test_stream_load_on_stock_in_memory_sqlite() -> None:
+    """Works with the default engine: thread-bound sqlite3, one DB per thread."""
+    stock = create_engine("sqlite://", future=True)  # SingletonThreadPool, same-thread checks
+    committed: list[int] = []
+
+    def factory() -> Session:
+        db = Session(stock)
+        # the DB only exists on the writer thread, so count there just before commit
+        event.listen(
+            db,
+            "before_commit",
+            lambda s: committed.append(
+                s.execute(text("SELECT COUNT(*) FROM tmp_animals_sample")).scalar_one()
             ),
-            {"id": 77813886},
         )
-        .mappings()
-        .one()
-    )
+        return db
+
+    loaded = stream_load(iter(SAMPLE_ROWS), batch_size=2, session_factory=factory)
+
+    assert loaded == len(sample_animals)
+    assert committed == [len(sample_animals)]
+    stock.dispose()
+
+
+def test_stream_load_leaves_sqlite_file_settings_alone(tmp_path: Path) -> None:
+    """Loading must not persistently switch the user's DB file to WAL."""
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'etl.db'}", future=True)
+    with file_engine.begin() as conn:
+        conn.execute(text(DDL))
+
+    loaded = stream_load(iter(SAMPLE_ROWS), session_factory=sessionmaker(bind=file_engine))
+
+    assert loaded == len(sample_animals)
+    with file_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar_one() == "delete"
+    file_engine.dispose()
+
+
+# ---------- Postgres COPY path (compiled / faked; no server needed) ----------
+
+_COLUMN_NAMES = [c.name for c in tmp_animals_sample.c]
+
+
+def test_postgres_upsert_and_merge_sql() -> None:
+    """Postgres statements target id and overwrite every non-key column."""
+    pg = create_engine("postgresql+psycopg://").dialect  # compile only, never connects
+    upsert_sql = str(_upsert_stmt("postgresql").compile(dialect=pg))
+    assert "ON CONFLICT (id) DO UPDATE SET" in upsert_sql
+
+    assert "ON COMMIT DROP" in STAGE_DDL
+    assert "LIKE tmp_animals_sample" in STAGE_DDL
+    # one row per id survives, preferring the latest status change
+    assert "DISTINCT ON (id)" in MERGE_SQL
+    assert "ORDER BY id, status_changed_at DESC NULLS LAST" in MERGE_SQL
+    for c in _UPDATE_COLS:
+        assert f"{c}=EXCLUDED.{c}" in MERGE_SQL
+        assert f"{c} = excluded.{c}" in upsert_sql
+
+
+class _FakeCopy:
+    def __init__(self) -> None:
+        self.rows: list[list[Any]] = []
+
+    def write_row(self, row: list[Any]) -> None:
+        self.rows.append(row)
+
+
+class _FakeCursor:
+    def __init__(self) -> None:
+        self.copy_sql: str | None = None
+        self.copier = _FakeCopy()
+
+    def __enter__(self) -> "_FakeCursor":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def copy(self, sql: str) -> nullcontext[_FakeCopy]:
+        self.copy_sql = sql
+        return nullcontext(self.copier)
+
+
+def _fake_session(driver_connection: Any) -> Session:
+    pooled = SimpleNamespace(connection=SimpleNamespace(driver_connection=driver_connection))
+    return cast(Session, SimpleNamespace(connection=lambda: pooled))
+
+
+def test_copy_to_stage_writes_rows_in_order_and_column_order() -> None:
+    """Rows stream in input order, each laid out in COPY_SQL's column order."""
+    cursor = _FakeCursor()
+    db = _fake_session(SimpleNamespace(cursor=lambda: cursor))
+    rows = SAMPLE_ROWS[::-1]
+
+    copied = copy_to_stage(db, iter(rows))
+
+    assert copied == len(rows)
+    assert cursor.copy_sql == COPY_SQL
+    copy_cols = COPY_SQL[COPY_SQL.index("(") + 1 : COPY_SQL.index(")")].split(", ")
+    assert copy_cols == _COLUMN_NAMES
+    assert cursor.copier.rows == [[r[c] for c in copy_cols] for r in rows]
+
 
-    assert row["name"] == "Shelina (Updated)"
-    assert row["status"] == "adopted"
-    assert as_utc_dt(row["published_at"]) == dt.datetime(2025, 8, 17, 0, 0, tzinfo=dt.timezone.utc)
+def test_copy_to_stage_requires_live_connection() -> None:
+    """An invalidated pooled connection is an explicit error, not a stripped assert."""
+    with pytest.raises(RuntimeError, match="live DBAPI connection"):
+        copy_to_stage(_fake_session(None), iter(SAMPLE_ROWS))